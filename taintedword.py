@@ -7,93 +7,252 @@ Usage:
     python taintedword.py <file.docx> [--json]
 """
 
-import argparse
+import functools
+import glob
+import os
 import zipfile
-import xml.etree.ElementTree as ET
 import json
 import sys
 import re
+import hashlib
+import mmap
+import struct
+import threading
+import types
+import zlib
+
+try:
+    from lxml import etree as ET
+    HAVE_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAVE_LXML = False
+
+try:
+    import deflate  # libdeflate bindings: faster whole-buffer inflate and CRC-32
+    HAVE_LIBDEFLATE = True
+except ImportError:
+    HAVE_LIBDEFLATE = False
 
 NAMESPACES = {
     "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "ep": "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties",
 }
 
+_STYLE_ID_KEY = f"{{{NAMESPACES['w']}}}styleId"
+# Lowercased styleIds LibreOffice writes for its default paragraph styles.
+_LO_STYLE_NAMES = frozenset(["text body", "standard", "heading", "index"])
+
+# parts key prefix -> ZIP member; each is exposed to the checks as "<key>_txt".
+PART_NAMES = {
+    "app": "docProps/app.xml",
+    "core": "docProps/core.xml",
+    "custom_props": "docProps/custom.xml",
+    "content_types": "[Content_Types].xml",
+    "font": "word/fontTable.xml",
+    "doc": "word/document.xml",
+    "styles": "word/styles.xml",
+    "settings": "word/settings.xml",
+    "theme": "word/theme/theme1.xml",
+    "web_settings": "word/webSettings.xml",
+}
+
+# Literal needles probed by the origin checks, keyed by the part they are looked
+# up in. score_docx tests each needle once per part and stores the matches as
+# parts["<key>_hits"]; the checks then do set lookups instead of rescanning.
+_NEEDLES = {
+    "app": ("Application", "AppVersion", "Company", "<Application>", "<Template>",
+            "Microsoft Word for the web", "Microsoft Office Word"),
+    "core": ("schemas.openxmlformats.org/officeDocument/2006/bibliography",
+             "schemas.microsoft.com/office", "<cp:coreProperties", "<lastModifiedBy>",
+             "<revision>", "<cp:revision>"),
+    "custom_props": ("<vt:bool>0</vt:bool>", "<vt:bool>1</vt:bool>", "vt:lpwstr", "$Linux_"),
+    "content_types": ("image/png", "image/jpeg"),
+    "font": ("Liberation", "Noto", "Lohit", "<w:panose1", "<w:sig", "Play Bold", "Roboto",
+             "Noto Sans", "Noto Serif", "Calibri", "Cambria", "Cambria Math", "Aptos", "Lucida",
+             "SimSun", "KaiTi", "FangSong"),
+    "doc": ("<w:formProt", "rsidR", "mc:Ignorable", "<w:pPr>", "w:spacing", "w:ind",
+            "w:contextualSpacing", "<w:document xmlns:w=", "xmlns:w=", "xmlns:r=", "xmlns:mc=",
+            "xmlns:w14=", "xmlns:w15=", "xmlns:w16=", '<w:rFonts w:ascii="Times"'),
+    "styles": ("Liberation Sans", "Liberation Serif", "Noto Sans", "Lohit",
+               'w:semiHidden w:val="1"', 'w:unhideWhenUsed w:val="1"', "word/2015/wordml/symex",
+               "w16se", "<w:latentStyles", '<w:styleId="Normal"',
+               'styleId="SourceCode"', 'styleId="VerbatimChar"', 'styleId="KeywordTok"',
+               'styleId="StringTok"', 'styleId="CommentTok"', "Heading1", "Heading2", "Heading3"),
+    "settings": ("<w:autoHyphenation", "w16du"),
+    "theme": ("Helvetica Neue", "<a:theme", "Office Theme", "xmlns:thm15", "<a:srgbClr",
+              "<a:sysClr", "<a:objectDefaults>", "<a:extLst>", 'name="Default Theme"', "w16du",
+              "4F81BD", "C0504D", "9BBB59", "8064A2", "4BACC6", "F79646"),
+}
+
+# --- Precompiled patterns ----------------------------------------------------
+
+_RE_DECIMAL_W = re.compile(r'w:w="[\d]+\.[\d]+"')
+_RE_LOWER_HEX = re.compile(r'w:color w:val="[0-9a-f]{6}"')
+_RE_PLAY_FONT = re.compile(r'w:font[^>]+name="Play"')
+_RE_APPLE_PAGES = re.compile(r"\bApple\b|\bPages\b")
+_RE_EMPTY_AUTHOR = re.compile(r"<dc:creator\s*/>|<cp:lastModifiedBy>\s*</cp:lastModifiedBy>")
+
+# OnlyOffice table/revision serialization quirks (document.xml). The tag
+# signals share one pass: the common "<w:" prefix lets re skip ahead between
+# tags, and the "A precedes B" tails are lookaheads so B is still matched.
+_RE_ONLYOFFICE_TAGS = re.compile(
+    r'<w:(?:'
+    r'(?P<cell>tblCellSpacing[^>]*w:w="(?P<cell_w>\d+)")'
+    r'|(?P<layout>tblLayout[^>]*w:type="fixed")'
+    r'|(?P<look>tblLook[^>]*w:val="0[4-7][A-F0-9]{2}")'
+    r'|(?P<tblw>tblW[^>]*>(?=\s*<w:tblStyle))'
+    r'|(?P<borders>tblBorders[^>]*>(?=\s*<w:tblLayout))'
+    r'|(?P<pr_change>(?:tbl|tr|tc|p|r)PrChange))'
+)
+_RE_TWIP = re.compile(r'w:w="(\d+)"')
+_RE_ITEM_PROPS = re.compile(r'itemProps\d+\.xml')
+# matched case-insensitively against the lowered document
+_OFORM_MARKERS = ("formid=", "glossaryid=", "jsaproject")
+
+# Override PartNames in [Content_Types].xml, in document order
+_RE_CT_OVERRIDE = re.compile(r'<(?:\w+:)?Override\b[^>]*\bPartName\s*=\s*["\']([^"\']*)["\']')
+
+# Word Web / SharePoint (core.xml)
+_RE_SHAREPOINT = re.compile(r"https://.*sharepoint\.com", re.I)
+
 # --- ZIP & XML helpers -------------------------------------------------------
 
-def read_xml_from_zip(zf, name):
+def xml_parser():
+    """Parser that drops comments/PIs like stdlib ElementTree does (lxml keeps them)."""
+    if HAVE_LXML:
+        return ET.XMLParser(remove_comments=True, remove_pis=True, resolve_entities=False)
+    return None
+
+def read_bytes_from_zip(zf, name):
     try:
-        with zf.open(name) as f:
-            return ET.fromstring(f.read())
+        return zf.read(name)
     except KeyError:
+        return b""
+
+# Local file header: signature, 22 fixed bytes we don't need, name/extra lengths.
+_LOCAL_HEADER = struct.Struct("<4s22xHH")
+
+if HAVE_LIBDEFLATE:
+    def inflate(data, size):
+        return bytes(deflate.deflate_decompress(data, size))
+    crc32 = deflate.crc32
+    _INFLATE_ERRORS = (zlib.error, deflate.DeflateError)
+else:
+    def inflate(data, size):
+        return zlib.decompress(data, -15, size)
+    crc32 = zlib.crc32
+    _INFLATE_ERRORS = (zlib.error,)
+
+def map_file(f):
+    """Read-only mmap of an open file, or None where that isn't possible (e.g. empty)."""
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
         return None
 
-def read_text_from_zip(zf, name):
+def read_mapped_member(mm, info):
+    """Inflate a member straight out of the mapped archive with one inflate call.
+
+    Skips ZipExtFile's buffered read loop. Returns None for anything it doesn't
+    handle (encryption, other codecs, bad header or CRC) so the caller can fall
+    back to ZipFile.read, which raises the proper error.
+    """
+    if info.flag_bits & 0x1 or info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        return None
     try:
-        with zf.open(name) as f:
-            return f.read().decode("utf-8", "ignore")
-    except KeyError:
-        return ""
+        sig, name_len, extra_len = _LOCAL_HEADER.unpack_from(mm, info.header_offset)
+        if sig != b"PK\x03\x04":
+            return None
+        # ZipFile.read refuses members whose local name differs from the
+        # central directory's; leave those to it.
+        name_start = info.header_offset + _LOCAL_HEADER.size
+        name = mm[name_start:name_start + name_len]
+        if name.decode("utf-8" if info.flag_bits & 0x800 else "cp437") != info.orig_filename:
+            return None
+        start = name_start + name_len + extra_len
+        end = start + info.compress_size
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            # Inflate from a view of the map rather than a copied slice; the
+            # view must be released before the map can be closed.
+            with memoryview(mm) as view:
+                data = inflate(view[start:end], info.file_size)
+        else:
+            data = mm[start:end]
+    except (struct.error, UnicodeDecodeError) + _INFLATE_ERRORS:
+        return None
+    if len(data) != info.file_size or crc32(data) != info.CRC:
+        return None
+    return data
 
-def xml_to_text(root):
-    if root is None:
-        return ""
-    return ET.tostring(root, encoding="utf-8").decode("utf-8", "ignore")
+def parse_xml(data):
+    if not data:
+        return None
+    return ET.fromstring(data, xml_parser())
+
+def scan_needles(text, needles):
+    """Return the subset of *needles* that occur in *text*."""
+    return frozenset(n for n in needles if n in text)
+
+def scan_document_xml(doc_txt):
+    """Derive every document.xml fact the origin checks use in one place.
+
+    document.xml is by far the largest part, so it is scanned once here and the
+    checks only consult the resulting flags/counters.
+    """
+    return {
+        "doc_hits": scan_needles(doc_txt, _NEEDLES["doc"]),
+        # Bare (attribute-less) run/paragraph tags; the checks compare their ratio.
+        "n_wr": doc_txt.count("<w:r>"),
+        "n_wp": doc_txt.count("<w:p>"),
+    }
 
 # --- LibreOffice signals -----------------------------------------------------
 
 def lo_checks(zf, parts):
     score, ev = 0.0, []
-    app_xml = parts["app_xml"]
-    if app_xml is not None:
-        for elem in app_xml.iter():
-            if elem.tag.endswith("Application"):
-                val = (elem.text or "").lower()
-                if "libreoffice" in val:
-                    score += 6
-                    ev.append("Application tag indicates LibreOffice")
-                break
-    font_txt = parts["font_txt"]
-    if any(f in font_txt for f in ["Liberation", "Noto", "Lohit"]):
+    if "libreoffice" in parts["application_name"]:
+        score += 6
+        ev.append("Application tag indicates LibreOffice")
+    font_hits = parts["font_hits"]
+    if any(f in font_hits for f in ["Liberation", "Noto", "Lohit"]):
         score += 3
         ev.append("LibreOffice font families present (Liberation/Noto/Lohit)")
-    if "<w:panose1" not in font_txt and "<w:sig" not in font_txt and font_txt:
+    if "<w:panose1" not in font_hits and "<w:sig" not in font_hits and parts["font_txt"]:
         ev.append("No <w:panose1> or <w:sig> font fingerprints (often present in Word)")
-    doc_txt = parts["doc_txt"]
-    if "<w:formProt" in doc_txt:
+    if "<w:formProt" in parts["doc_hits"]:
         score += 3
         ev.append("Found <w:formProt> (LibreOffice hallmark)")
     styles_txt = parts["styles_txt"]
     if styles_txt:
         try:
             styles_root = parts["styles_xml"]
-            names = [s.get(f"{{{NAMESPACES['w']}}}styleId", "").lower()
-                     for s in styles_root.findall("w:style", NAMESPACES)]
-            if any(n in names for n in ["text body", "standard", "heading", "index"]):
+            names = {s.get(_STYLE_ID_KEY, "").lower()
+                     for s in styles_root.iterfind("w:style", NAMESPACES)}
+            if names & _LO_STYLE_NAMES:
                 score += 3
                 ev.append("Found LibreOffice-style names (Text Body / Standard)")
         except Exception:
             pass
-        if any(f in styles_txt for f in ["Liberation Sans", "Liberation Serif", "Noto Sans", "Lohit"]):
+        if any(f in parts["styles_hits"] for f in ["Liberation Sans", "Liberation Serif", "Noto Sans", "Lohit"]):
             score += 3
             ev.append("LibreOffice font families referenced in styles")
-    settings_txt = parts["settings_txt"]
-    if "<w:autoHyphenation" in settings_txt:
+    if "<w:autoHyphenation" in parts["settings_hits"]:
         score += 0.5
         ev.append("Contains <w:autoHyphenation> (possible LO default)")
-    ct_txt = parts["content_types_txt"]
-    if any(m in ct_txt for m in ["image/png", "image/jpeg"]):
+    if any(m in parts["content_types_hits"] for m in ["image/png", "image/jpeg"]):
         score += 1
         ev.append("Lists extra image MIME types (often seen in LO)")
-    custom_txt = parts["custom_props_txt"]
-    if "<vt:bool>0</vt:bool>" in custom_txt or "<vt:bool>1</vt:bool>" in custom_txt:
+    custom_hits = parts["custom_props_hits"]
+    if "<vt:bool>0</vt:bool>" in custom_hits or "<vt:bool>1</vt:bool>" in custom_hits:
         score += 0.2
         ev.append("Boolean serialization uses numeric form (LibreOffice style)")
-    if "vt:lpwstr" in custom_txt and "$Linux_" in custom_txt:
+    if "vt:lpwstr" in custom_hits and "$Linux_" in custom_hits:
         score += 0.3
         ev.append("AppVersion property includes LibreOffice/Linux signature")
-    core_txt = parts["core_txt"]
-    if ("schemas.openxmlformats.org/officeDocument/2006/bibliography" in core_txt
-            and "schemas.microsoft.com/office" not in core_txt):
+    core_hits = parts["core_hits"]
+    if ("schemas.openxmlformats.org/officeDocument/2006/bibliography" in core_hits
+            and "schemas.microsoft.com/office" not in core_hits):
         score += 0.4
         ev.append("Open bibliography schema without Microsoft URIs (LO-style rewrite)")
     return min(score, 10.0), ev
@@ -103,25 +262,27 @@ def lo_checks(zf, parts):
 def gdocs_checks(zf, parts):
     score, ev = 0.0, []
     styles_txt = parts["styles_txt"]
+    styles_hits = parts["styles_hits"]
     font_txt = parts["font_txt"]
-    if 'w:semiHidden w:val="1"' in styles_txt or 'w:unhideWhenUsed w:val="1"' in styles_txt:
+    font_hits = parts["font_hits"]
+    if 'w:semiHidden w:val="1"' in styles_hits or 'w:unhideWhenUsed w:val="1"' in styles_hits:
         score += 2.0
         ev.append("Boolean attributes serialized as w:val='1' (Google Docs pattern)")
-    if re.search(r'w:w="[\d]+\.[\d]+"', styles_txt):
+    if _RE_DECIMAL_W.search(styles_txt):
         score += 1.5
         ev.append("Decimal-style numeric attributes (e.g., w:w='0.0') found")
-    lower_hex = bool(re.search(r'w:color w:val="[0-9a-f]{6}"', styles_txt))
+    lower_hex = bool(_RE_LOWER_HEX.search(styles_txt))
     if lower_hex:
         ev.append("Lowercase 6-digit hex color codes (weak Google Docs pattern)")
-    has_symex = ("word/2015/wordml/symex" in styles_txt or "w16se" in styles_txt)
+    has_symex = ("word/2015/wordml/symex" in styles_hits or "w16se" in styles_hits)
     if has_symex:
         ev.append("Contains w16se:symex namespace (weak marker; Word may include)")
     fonts_hit = False
-    if re.search(r'w:font[^>]+name="Play"', font_txt) or "Play Bold" in font_txt:
+    if _RE_PLAY_FONT.search(font_txt) or "Play Bold" in font_hits:
         score += 3.0
         fonts_hit = True
         ev.append("Contains Play / Play Bold fonts (Google bundle)")
-    if any(f in font_txt for f in ["Roboto", "Noto Sans", "Noto Serif"]):
+    if any(f in font_hits for f in ["Roboto", "Noto Sans", "Noto Serif"]):
         score += 1.5
         fonts_hit = True
         ev.append("Contains Roboto/Noto font families (Google pattern)")
@@ -136,22 +297,22 @@ def gdocs_checks(zf, parts):
 
 def pages_checks(zf, parts):
     score, ev = 0.0, []
-    theme_txt = parts["theme_txt"]
-    app_core_txt = (parts["app_txt"] + parts["core_txt"])
-    if "Helvetica Neue" in theme_txt:
+    theme_hits = parts["theme_hits"]
+    app_core_txt = parts["app_core_txt"]
+    if "Helvetica Neue" in theme_hits:
         score += 4.5
         ev.append("Contains Helvetica Neue (Apple Pages default font)")
-    if "<a:theme" in theme_txt and "Office Theme" in theme_txt and "xmlns:thm15" not in theme_txt:
+    if "<a:theme" in theme_hits and "Office Theme" in theme_hits and "xmlns:thm15" not in theme_hits:
         score += 1.5
         ev.append("Missing thm15 theme namespace (Pages-style theme)")
-    if "<a:srgbClr" in theme_txt and "<a:sysClr" not in theme_txt:
+    if "<a:srgbClr" in theme_hits and "<a:sysClr" not in theme_hits:
         score += 1.0
         ev.append("Theme uses only <a:srgbClr> (no <a:sysClr>)")
-    if "<a:objectDefaults>" not in theme_txt or "<a:extLst>" not in theme_txt:
+    if "<a:objectDefaults>" not in theme_hits or "<a:extLst>" not in theme_hits:
         if score >= 1.5:
             score += 0.5
             ev.append("No <a:objectDefaults> or <a:extLst> (weak Pages indicator)")
-    if re.search(r"\bApple\b|\bPages\b", app_core_txt):
+    if _RE_APPLE_PAGES.search(app_core_txt):
         score += 3.5
         ev.append("Explicit Apple/Pages marker in metadata")
     return min(score, 10.0), ev
@@ -161,70 +322,71 @@ def pages_checks(zf, parts):
 def pandoc_checks(zf, parts):
     score, ev = 0.0, []
     app_txt = parts["app_txt"]
+    app_hits = parts["app_hits"]
     core_txt = parts["core_txt"]
-    styles_txt = parts["styles_txt"]
-    theme_txt = parts["theme_txt"]
-    doc_txt = parts["doc_txt"]
-    font_txt = parts["font_txt"]
+    styles_hits = parts["styles_hits"]
+    theme_hits = parts["theme_hits"]
+    doc_hits = parts["doc_hits"]
+    font_hits = parts["font_hits"]
 
     # Explicit Pandoc mention
-    if re.search(r"pandoc", (app_txt + core_txt), re.I):
+    if "pandoc" in parts["app_core_lower"]:
         score += 8
         ev.append("Application or core properties mention Pandoc")
 
     # Programmatic minimalism
-    if not any(tag in app_txt for tag in ["Application", "AppVersion", "Company"]) and app_txt.strip():
+    if not any(tag in app_hits for tag in ["Application", "AppVersion", "Company"]) and app_txt.strip():
         score += 1.5
         ev.append("App properties minimal (likely programmatic generation)")
 
     # Semantic style names
-    if re.search(r"styleId=\"SourceCode\"|styleId=\"VerbatimChar\"", styles_txt):
+    if 'styleId="SourceCode"' in styles_hits or 'styleId="VerbatimChar"' in styles_hits:
         score += 2.5
         ev.append("Contains 'SourceCode' / 'VerbatimChar' styles (Pandoc hallmark)")
-    if re.search(r"styleId=\"KeywordTok\"|styleId=\"StringTok\"|styleId=\"CommentTok\"", styles_txt):
+    if any(s in styles_hits for s in ['styleId="KeywordTok"', 'styleId="StringTok"', 'styleId="CommentTok"']):
         score += 2.0
         ev.append("Contains Pygments token styles (Pandoc code highlighting)")
 
     # Theme simplification
-    if "xmlns:thm15" not in theme_txt and "<a:srgbClr" in theme_txt and "<a:sysClr" not in theme_txt:
+    if "xmlns:thm15" not in theme_hits and "<a:srgbClr" in theme_hits and "<a:sysClr" not in theme_hits:
         score += 1.5
         ev.append("Theme lacks thm15 namespace, uses only sRGB colors (Pandoc minimal theme)")
 
     # Fonts
-    if all(f in font_txt for f in ["Calibri", "Cambria"]) and not any(x in font_txt for x in ["Aptos", "Liberation", "Roboto"]):
+    if all(f in font_hits for f in ["Calibri", "Cambria"]) and not any(x in font_hits for x in ["Aptos", "Liberation", "Roboto"]):
         score += 1.0
         ev.append("Generic Calibri/Cambria font table (typical Pandoc default)")
 
     # No rsid / mc:Ignorable
-    if "rsidR" not in doc_txt and "mc:Ignorable" not in doc_txt:
+    if "rsidR" not in doc_hits and "mc:Ignorable" not in doc_hits:
         score += 1.0
         ev.append("Document XML lacks Word-specific rsid and mc:Ignorable attributes")
 
     # Web settings
-    web_txt = read_text_from_zip(zf, "word/webSettings.xml")
+    web_txt = parts["web_settings_txt"]
     if "<w:doNotSaveAsSingleFile" in web_txt and "optimizeForBrowser" not in web_txt:
         score += 0.8
         ev.append("Contains <w:doNotSaveAsSingleFile> without optimizeForBrowser (Pandoc default)")
 
     # Missing latent styles
-    if "<w:latentStyles" not in styles_txt and "<w:styleId=\"Normal\"" in styles_txt:
+    if "<w:latentStyles" not in styles_hits and "<w:styleId=\"Normal\"" in styles_hits:
         score += 0.8
         ev.append("Missing <w:latentStyles> (common in Pandoc-generated DOCX)")
 
     # Behavioral round-trip fidelity heuristics
-    if doc_txt.count("<w:r>") < 2 * doc_txt.count("<w:p>"):
+    if parts["n_wr"] < 2 * parts["n_wp"]:
         score += 0.8
         ev.append("Low <w:r>/<w:p> ratio (flattened run structure typical of Pandoc)")
-    if "<w:pPr>" in doc_txt and not any(k in doc_txt for k in ["w:spacing", "w:ind", "w:contextualSpacing"]):
+    if "<w:pPr>" in doc_hits and not any(k in doc_hits for k in ["w:spacing", "w:ind", "w:contextualSpacing"]):
         score += 0.5
         ev.append("Paragraph properties minimal (no spacing/indent attributes)")
-    if "Lucida" in font_txt and "Cambria Math" not in font_txt:
+    if "Lucida" in font_hits and "Cambria Math" not in font_hits:
         score += 0.5
         ev.append("Math font substitution (Lucida instead of Cambria Math)")
-    if any(c in theme_txt for c in ["4F81BD", "C0504D", "9BBB59", "8064A2", "4BACC6", "F79646"]):
+    if any(c in theme_hits for c in ["4F81BD", "C0504D", "9BBB59", "8064A2", "4BACC6", "F79646"]):
         score += 0.5
         ev.append("Classic Office 2007 color palette (Pandoc default theme)")
-    if re.search(r"<dc:creator\s*/>|<cp:lastModifiedBy>\s*</cp:lastModifiedBy>", core_txt):
+    if _RE_EMPTY_AUTHOR.search(core_txt):
         score += 0.5
         ev.append("Empty author/modified fields (metadata stripped by Pandoc)")
 
@@ -237,26 +399,27 @@ def wordpad_checks(zf, parts):
     score, ev = 0.0, []
 
     # WordPad omits theme, fontTable, settings, and most docProps.
-    content_types = parts["content_types_txt"]
-    has_theme = "/word/theme/theme1.xml" in content_types
-    has_settings = "/word/settings.xml" in content_types
-    has_fonts = "/word/fontTable.xml" in content_types
+    ct_parts = parts["ct_parts"]
+    has_theme = "/word/theme/theme1.xml" in ct_parts
+    has_settings = "/word/settings.xml" in ct_parts
+    has_fonts = "/word/fontTable.xml" in ct_parts
     if not has_theme and not has_settings and not has_fonts:
         score += 3
         ev.append("Content_Types.xml lacks theme/settings/fontTable overrides (WordPad pattern)")
 
     # Styles.xml is tiny (1–10 lines) and only has 'Normal'
     styles_txt = parts["styles_txt"]
-    if 0 < len(styles_txt.splitlines()) < 10 and "<w:styleId=\"Normal\"" in styles_txt:
+    styles_hits = parts["styles_hits"]
+    if 0 < len(styles_txt.splitlines()) < 10 and "<w:styleId=\"Normal\"" in styles_hits:
         score += 3
         ev.append("Tiny styles.xml with only 'Normal' style (WordPad hallmark)")
 
     # document.xml: very simple namespaces and structure
-    doc_txt = parts["doc_txt"]
+    doc_hits = parts["doc_hits"]
     if (
-        '<w:document xmlns:w=' in doc_txt
-        and 'xmlns:r=' not in doc_txt
-        and 'xmlns:mc=' not in doc_txt
+        '<w:document xmlns:w=' in doc_hits
+        and 'xmlns:r=' not in doc_hits
+        and 'xmlns:mc=' not in doc_hits
     ):
         score += 3
         ev.append("Document XML uses only xmlns:w (minimal namespace set typical of WordPad)")
@@ -275,58 +438,67 @@ def textedit_checks(zf, parts):
     """Heuristic detection of Apple TextEdit–generated DOCX files."""
     score, ev = 0.0, []
 
-    content_types = parts["content_types_txt"]
+    ct_parts = parts["ct_parts"]
+    has_theme = "/word/theme/theme1.xml" in ct_parts
+    has_styles = "/word/styles.xml" in ct_parts
+    has_settings = "/word/settings.xml" in ct_parts
+    has_fonts = "/word/fontTable.xml" in ct_parts
+    has_numbering = "/word/numbering.xml" in ct_parts
+    has_custom = "/docProps/custom.xml" in ct_parts
+    has_customxml = any(p.startswith("/customXml/") for p in ct_parts)
     app_txt = parts["app_txt"]
+    app_hits = parts["app_hits"]
     core_txt = parts["core_txt"]
-    doc_txt = parts["doc_txt"]
-    theme_txt = parts["theme_txt"]
+    core_hits = parts["core_hits"]
+    doc_hits = parts["doc_hits"]
+    theme_hits = parts["theme_hits"]
 
     # 1. [Content_Types].xml: theme present but NO styles/settings/fontTable/etc.
     #    TextEdit keeps /word/theme/theme1.xml but strips nearly everything else.
     if (
-        "/word/theme/theme1.xml" in content_types
-        and "/word/styles.xml" not in content_types
-        and "/word/settings.xml" not in content_types
-        and "/word/fontTable.xml" not in content_types
-        and "/word/numbering.xml" not in content_types
+        has_theme
+        and not has_styles
+        and not has_settings
+        and not has_fonts
+        and not has_numbering
     ):
         score += 3
         ev.append("Has theme but lacks styles/settings/fontTable/numbering (TextEdit pattern)")
 
     # 2. docProps/app.xml: usually just an empty <Properties> element
-    if app_txt.strip().startswith("<Properties") and "<Application>" not in app_txt:
+    if app_txt.strip().startswith("<Properties") and "<Application>" not in app_hits:
         score += 3
         ev.append("app.xml is empty <Properties> with no <Application> tag (TextEdit hallmark)")
 
     # 3. docProps/core.xml: rewritten with 'cp:' prefix and only <dc:creator>
     if (
-        "<cp:coreProperties" in core_txt
+        "<cp:coreProperties" in core_hits
         and core_txt.count("<dc:") == 1
-        and "<lastModifiedBy>" not in core_txt
-        and "<revision>" not in core_txt
+        and "<lastModifiedBy>" not in core_hits
+        and "<revision>" not in core_hits
     ):
         score += 2
         ev.append("core.xml uses cp: prefix and only dc:creator (TextEdit serialization)")
 
     # 4. document.xml: stripped to basic w:, r:, v:, wp: namespaces; no w14+, mc:, w15 etc.
     if (
-        "xmlns:w=" in doc_txt
-        and all(x not in doc_txt for x in ["xmlns:mc=", "xmlns:w14=", "xmlns:w15=", "xmlns:w16="])
-        and '<w:rFonts w:ascii="Times"' in doc_txt
+        "xmlns:w=" in doc_hits
+        and all(x not in doc_hits for x in ["xmlns:mc=", "xmlns:w14=", "xmlns:w15=", "xmlns:w16="])
+        and '<w:rFonts w:ascii="Times"' in doc_hits
     ):
         score += 2
         ev.append("document.xml limited to base namespaces and hardcoded Times font")
 
     # 5. Theme name: "Default Theme" instead of "Office Theme"
-    if "name=\"Default Theme\"" in theme_txt:
+    if "name=\"Default Theme\"" in theme_hits:
         score += 1
         ev.append("Theme1.xml uses name='Default Theme' (TextEdit theme rewrite)")
 
     # 6. Overall metadata: no custom.xml, no customProps, no extended app info
     if (
-        "/docProps/custom.xml" not in content_types
-        and "/customXml/" not in content_types
-        and "<Template>" not in app_txt
+        not has_custom
+        and not has_customxml
+        and "<Template>" not in app_hits
     ):
         score += 1
         ev.append("No customXml or extended properties (TextEdit metadata purge)")
@@ -338,28 +510,22 @@ def textedit_checks(zf, parts):
 
 def word_checks(zf, parts, lo_score, gd_score, pg_score):
     score, ev = 0.0, []
-    app_xml = parts["app_xml"]
-    if app_xml is not None:
-        for elem in app_xml.iter():
-            if elem.tag.endswith("Application"):
-                val = (elem.text or "").lower()
-                if "word" in val:
-                    score += 4.0
-                    ev.append("Application tag indicates Microsoft Word")
-                break
-    theme_txt = parts["theme_txt"]
-    font_txt = parts["font_txt"]
-    styles_txt = parts["styles_txt"]
-    if "xmlns:thm15" in theme_txt:
+    if "word" in parts["application_name"]:
+        score += 4.0
+        ev.append("Application tag indicates Microsoft Word")
+    theme_hits = parts["theme_hits"]
+    font_hits = parts["font_hits"]
+    styles_hits = parts["styles_hits"]
+    if "xmlns:thm15" in theme_hits:
         score += 1.5
         ev.append("Theme includes thm15 namespace (common in Word)")
-    if "<a:sysClr" in theme_txt:
+    if "<a:sysClr" in theme_hits:
         score += 1.0
         ev.append("Theme uses <a:sysClr> (Windows system color mapping)")
-    if "<w:panose1" in font_txt or "<w:sig" in font_txt:
+    if "<w:panose1" in font_hits or "<w:sig" in font_hits:
         score += 1.0
         ev.append("Font table includes <w:panose1> / <w:sig> fingerprints (Word)")
-    if re.search(r'Heading1|Heading2|Heading3', styles_txt):
+    if any(h in styles_hits for h in ["Heading1", "Heading2", "Heading3"]):
         score += 0.8
         ev.append("Heading1–3 style cascade present (Word defaults)")
     if lo_score < 4 and gd_score < 4 and pg_score < 4:
@@ -368,67 +534,71 @@ def word_checks(zf, parts, lo_score, gd_score, pg_score):
         
     # --- DEBUG robust python-docx [Content_Types].xml order detector ----------
     # --- python-docx [Content_Types].xml ordering heuristic -------------------
-    try:
-        raw = parts["content_types_txt"]
-        root = ET.fromstring(raw)
-        overrides = [elem.attrib.get("PartName", "") for elem in root if elem.tag.endswith("Override")]
-
-        if "/word/document.xml" in overrides:
-            # find last /docProps/* and first /word/* entries
-            docprops_last = max((i for i, p in enumerate(overrides) if p.startswith("/docProps/")), default=-1)
-            word_first = next((i for i, p in enumerate(overrides) if p.startswith("/word/")), None)
-
-            if docprops_last >= 0 and word_first is not None and docprops_last < word_first:
-                score -= 0.3
-                ev.append(
-                    "Override order in [Content_Types].xml shows docProps before /word/document.xml "
-                    "(python-docx generation pattern; small deduction)"
-                )
-    except Exception:
-        pass
-
-
-
-
+    overrides = parts["ct_overrides"]
+    if "/word/document.xml" in overrides:
+        # find last /docProps/* and first /word/* entries
+        docprops_last = max((i for i, p in enumerate(overrides) if p.startswith("/docProps/")), default=-1)
+        word_first = next((i for i, p in enumerate(overrides) if p.startswith("/word/")), None)
+
+        if docprops_last >= 0 and word_first is not None and docprops_last < word_first:
+            score -= 0.3
+            ev.append(
+                "Override order in [Content_Types].xml shows docProps before /word/document.xml "
+                "(python-docx generation pattern; small deduction)"
+            )
 
     return min(score, 10.0), ev
     
-def onlyoffice_checks(doc_text, evidence):
+def onlyoffice_checks(doc_text, evidence, doc_lower=None):
     """
     Detect signatures of OnlyOffice-generated DOCX files.
 
+    *doc_lower* is doc_text.lower() when the caller already has it.
+
     Returns:
         float: normalized score (0–10)
     """
-    import re
     score = 0
 
+    # One pass over the text for all table/revision tag signals.
+    cell_spacing = tbl_look = tblw_first = borders_first = pr_change = False
+    tbl_layouts = 0
+    for m in _RE_ONLYOFFICE_TAGS.finditer(doc_text):
+        kind = m.lastgroup
+        if kind == "cell":
+            cell_spacing = cell_spacing or int(m.group("cell_w")) % 1134 in range(0, 10)
+        elif kind == "layout":
+            tbl_layouts += 1
+        elif kind == "look":
+            tbl_look = True
+        elif kind == "tblw":
+            tblw_first = True
+        elif kind == "borders":
+            borders_first = True
+        else:
+            pr_change = True
 
-    for m in re.findall(r'<w:tblCellSpacing[^>]*w:w="(\d+)"', doc_text):
-        val = int(m)
-        if val % 1134 in range(0, 10):
-            evidence.append(f"Table cell spacing → doubled mm/twip conversion (OnlyOffice).")
-            score += 2
-            break
+    if cell_spacing:
+        evidence.append(f"Table cell spacing → doubled mm/twip conversion (OnlyOffice).")
+        score += 2
 
-    tbl_layouts = len(re.findall(r'<w:tblLayout[^>]*w:type="fixed"', doc_text))
     if tbl_layouts >= 3:
         evidence.append(f"{tbl_layouts} tables forced to fixed layout (OnlyOffice default).")
         score += 2
 
-    if re.search(r'<w:tblLook[^>]*w:val="0[4-7][A-F0-9]{2}"', doc_text):
+    if tbl_look:
         evidence.append("Nonstandard <w:tblLook> bitmask (OnlyOffice bit flag composition).")
         score += 2
 
 
-    if re.search(r'<w:tblW[^>]*>\s*<w:tblStyle', doc_text):
+    if tblw_first:
         evidence.append("<w:tblW> precedes <w:tblStyle> (OnlyOffice ordering).")
         score += 1
-    if re.search(r'<w:tblBorders[^>]*>\s*<w:tblLayout', doc_text):
+    if borders_first:
         evidence.append("<w:tblBorders> precedes <w:tblLayout> (OnlyOffice ordering).")
         score += 1
 
-    for m in re.findall(r'w:w="(\d+)"', doc_text):
+    for m in _RE_TWIP.findall(doc_text):
         v = int(m)
         if v % 5 not in (0, 5) and v % 10 != 0:
             evidence.append(f"Non-rounded twip {v} — float→int mm rounding (OnlyOffice).")
@@ -439,7 +609,7 @@ def onlyoffice_checks(doc_text, evidence):
         evidence.append("tblLayout present but missing mc:Ignorable (OnlyOffice omission).")
         score += 1
 
-    if re.search(r'<w:(tbl|tr|tc|p|r)PrChange', doc_text) and "<w:trackChange" not in doc_text:
+    if pr_change and "<w:trackChange" not in doc_text:
         evidence.append("Inline *PrChange blocks without trackChange (OnlyOffice-style revisions).")
         score += 2
 
@@ -457,7 +627,9 @@ def onlyoffice_checks(doc_text, evidence):
         evidence.append("Sections present but missing titlePg — older OnlyOffice export (<v5).")
         score += 1
 
-    if re.search(r'itemProps\d+\.xml', doc_text) or re.search(r'(formid=|glossaryid=|jsaproject)', doc_text, re.I):
+    if doc_lower is None:
+        doc_lower = doc_text.lower()
+    if _RE_ITEM_PROPS.search(doc_text) or scan_needles(doc_lower, _OFORM_MARKERS):
         evidence.append("References to OForm/Glossary/JSA — OnlyOffice extensions.")
         score += 2
 
@@ -476,41 +648,40 @@ def word_variants_checks(zf, parts):
     score = {"word_web": 0.0, "word_desktop": 0.0}
     ev = {"word_web": [], "word_desktop": []}
 
-    app_txt = parts["app_txt"]
-    core_txt = parts["core_txt"]
-    theme_txt = parts["theme_txt"]
-    font_txt = parts["font_txt"]
+    app_hits = parts["app_hits"]
+    core_hits = parts["core_hits"]
+    theme_hits = parts["theme_hits"]
+    font_hits = parts["font_hits"]
     styles_txt = parts["styles_txt"]
-    settings_txt = parts["settings_txt"]
-    doc_txt = parts["doc_txt"]
+    settings_hits = parts["settings_hits"]
 
     # Application tag check
-    if "Microsoft Word for the web" in app_txt:
+    if "Microsoft Word for the web" in app_hits:
         score["word_web"] += 6
         ev["word_web"].append("<Application>Microsoft Word for the web</Application> detected")
 
-    if "Microsoft Office Word" in app_txt:
+    if "Microsoft Office Word" in app_hits:
         score["word_desktop"] += 6
         ev["word_desktop"].append("<Application>Microsoft Office Word</Application> detected")
 
     # Font table clues
-    if "Aptos" in font_txt:
+    if "Aptos" in font_hits:
         score["word_desktop"] += 2
         ev["word_desktop"].append("Aptos/Aptos Display font (new Word 2024 default)")
-    if "Calibri" in font_txt and "Aptos" not in font_txt:
+    if "Calibri" in font_hits and "Aptos" not in font_hits:
         score["word_web"] += 1.5
         ev["word_web"].append("Legacy Calibri font (Word Web or pre-2024 Word)")
 
     # Theme clues
-    if "xmlns:thm15" in theme_txt:
+    if "xmlns:thm15" in theme_hits:
         score["word_web"] += 1
         ev["word_web"].append("Theme includes thm15 namespace (Word Web)")
-    if "w16du" in theme_txt or "w16du" in settings_txt:
+    if "w16du" in theme_hits or "w16du" in settings_hits:
         score["word_desktop"] += 1.5
         ev["word_desktop"].append("Modern WordML namespaces (Word 2023/2024 Desktop)")
 
     # Fragmented run structure
-    if doc_txt.count("<w:r>") > 3 * doc_txt.count("<w:p>"):
+    if parts["n_wr"] > 3 * parts["n_wp"]:
         score["word_web"] += 1.5
         ev["word_web"].append("Highly fragmented <w:r> structure (Word for Web pattern)")
     else:
@@ -518,7 +689,7 @@ def word_variants_checks(zf, parts):
         ev["word_desktop"].append("Compact run structure (Desktop Word)")
 
     # Revision / metadata depth
-    if "<cp:revision>" in core_txt:
+    if "<cp:revision>" in core_hits:
         score["word_desktop"] += 1
         ev["word_desktop"].append("Core properties include <cp:revision> (Desktop Word)")
     else:
@@ -577,7 +748,7 @@ def summarize_provenance(result):
     
 # much more speculative right now...
 # todo: integrate!
-def check_speculative_wordaspect(zf):
+def check_speculative_wordaspect(zf, parts):
     score, ev = 0, []
     for name in zf.namelist():
         if name.startswith("webextensions/"):
@@ -586,42 +757,38 @@ def check_speculative_wordaspect(zf):
         if "sharepoint.com" in name.lower():
             score += 5
             ev.append(f"References SharePoint URL in relationships: {name}")
-    core = read_text_from_zip(zf, "docProps/core.xml")
-    if re.search(r"https://.*sharepoint\.com", core, re.I):
+    core = parts["core_txt"]
+    if _RE_SHAREPOINT.search(core):
         score += 4
         ev.append("SharePoint reference found in core properties")
-    if re.search(r"Microsoft Office Word", core):
+    if "Microsoft Office Word" in core:
         score += 1
         ev.append("Application tag suggests Office Online editor")
     return min(score, 10), ev
 
-def check_speculative_lomarkeshare(xml_bundle):
+def check_speculative_lomarkeshare(zf, parts):
     """
     Blind heuristic scorer for 'other' DOCX sources:
     WPS Office, OnlyOffice, AbiWord, Calligra, WordPad, SoftMaker, Pandoc/docx4j/etc.
     Designed to detect origin when Application tag is missing or generic.
     
     Args:
-        xml_bundle (dict): dictionary of raw XML text content keyed by filename, e.g.:
-            {
-                "app": <str>,
-                "core": <str>,
-                "font": <str>,
-                "styles": <str>,
-                "theme": <str>,
-                "content": <str>,
-            }
+        zf: the open archive (unused; same signature as the other checks).
+        parts: the LazyParts mapping; reads the app/core/styles/theme/document
+            text, the font-table hits and the lowercased app+core(+document).
     
     Returns:
         dict: { "wps": score, "onlyoffice": score, "abiword": score,
                 "calligra": score, "wordpad": score, "softmaker": score, "programmatic": score },
         list of (engine, evidence) tuples.
     """
-    app, core, font, styles, theme, content = (
-        xml_bundle.get("app", ""), xml_bundle.get("core", ""),
-        xml_bundle.get("font", ""), xml_bundle.get("styles", ""),
-        xml_bundle.get("theme", ""), xml_bundle.get("content", "")
+    app, core, styles, theme, content = (
+        parts["app_txt"], parts["core_txt"], parts["styles_txt"],
+        parts["theme_txt"], parts["doc_txt"]
     )
+    app_core_lower = parts["app_core_lower"]
+    doc_lower = parts["doc_lower"]
+    font_hits = parts["font_hits"]
     
 
 
@@ -637,18 +804,18 @@ def check_speculative_lomarkeshare(xml_bundle):
     evidences = []
 
     # --- WPS Office (Kingsoft)
-    if any(x in (app + core).lower() for x in ["wps", "kingsoft", "wps office"]):
+    if any(x in app_core_lower for x in ["wps", "kingsoft", "wps office"]):
         scores["wps"] += 8
         evidences.append(("WPS Office", "Application metadata contains WPS/Kingsoft signature"))
-    if "schemas.wps.cn" in (app + content + styles):
+    if any("schemas.wps.cn" in t for t in (app, content, styles)):
         scores["wps"] += 5
         evidences.append(("WPS Office", "Contains Chinese WPS-specific XML namespace"))
-    if any(f in font for f in ["SimSun", "KaiTi", "FangSong"]):
+    if any(f in font_hits for f in ["SimSun", "KaiTi", "FangSong"]):
         scores["wps"] += 2
         evidences.append(("WPS Office", "CJK font families common in WPS Office"))
     
     # --- AbiWord
-    if "abiword" in (app + core).lower():
+    if "abiword" in app_core_lower:
         scores["abiword"] += 8
         evidences.append(("AbiWord", "Application tag or creator field mentions AbiWord"))
     if "<a:theme" not in theme and "<w:docDefaults" in styles:
@@ -659,34 +826,34 @@ def check_speculative_lomarkeshare(xml_bundle):
         evidences.append(("AbiWord", "Single 'Normal' style without headings (AbiWord pattern)"))
     
     # --- Calligra Words
-    if "calligra" in (app + core + content).lower():
+    if "calligra" in app_core_lower or "calligra" in doc_lower:
         scores["calligra"] += 8
         evidences.append(("Calligra Words", "Application metadata indicates Calligra Words"))
-    if "<w:compatSetting" not in content and "koffice" in (app + core).lower():
+    if "<w:compatSetting" not in content and "koffice" in app_core_lower:
         scores["calligra"] += 2
         evidences.append(("Calligra Words", "No compatSetting + legacy KOffice marker"))
     
     # --- WordPad
-    if "wordpad" in (app + core).lower():
+    if "wordpad" in app_core_lower:
         scores["wordpad"] += 8
         evidences.append(("WordPad", "Application tag indicates WordPad"))
-    if "word/theme/theme1.xml" not in content and "<w:styleId=\"Normal\"" in styles and "<w:style" not in content[500:]:
+    if "word/theme/theme1.xml" not in content and "<w:styleId=\"Normal\"" in styles and content.find("<w:style", 500) < 0:
         scores["wordpad"] += 3
         evidences.append(("WordPad", "No theme and only a 'Normal' style (WordPad pattern)"))
     
     # --- SoftMaker / FreeOffice (TextMaker)
-    if "textmaker" in (app + core + content).lower():
+    if "textmaker" in app_core_lower or "textmaker" in doc_lower:
         scores["softmaker"] += 8
         evidences.append(("TextMaker", "Application metadata includes TextMaker"))
-    if "SoftMaker Office" in (core + content):
+    if "SoftMaker Office" in core or "SoftMaker Office" in content:
         scores["softmaker"] += 6
         evidences.append(("TextMaker", "Custom props mention SoftMaker Office"))
     
     # --- Programmatic / Automated DOCX (Pandoc, docx4j, Apache POI)
-    if any(x in (app + core + content).lower() for x in ["pandoc", "docx4j", "aspose", "poi", "python-docx"]):
+    if any(x in app_core_lower or x in doc_lower for x in ["pandoc", "docx4j", "aspose", "poi", "python-docx"]):
         scores["programmatic"] += 8
         evidences.append(("Programmatic", "Metadata references Pandoc/docx4j/Aspose"))
-    if not any(f in (app + core + content) for f in ["Application", "AppVersion", "Company"]):
+    if not any(f in t for t in (app, core, content) for f in ["Application", "AppVersion", "Company"]):
         scores["programmatic"] += 2
         evidences.append(("Programmatic", "No app metadata tags (generated by library)"))
     if "<w:themeFontLang" not in styles and "<w:lang" in content:
@@ -695,7 +862,7 @@ def check_speculative_lomarkeshare(xml_bundle):
      
      
     # --- OnlyOffice
-    if "onlyoffice" in (app + core + content).lower():
+    if "onlyoffice" in app_core_lower or "onlyoffice" in doc_lower:
         scores["onlyoffice"] += 8
         evidences.append(("OnlyOffice", "Application metadata references OnlyOffice"))
     if "onlyoffice.com/schema" in content:
@@ -706,7 +873,7 @@ def check_speculative_lomarkeshare(xml_bundle):
         evidences.append(("OnlyOffice", "Missing latentStyles section (common in OnlyOffice exports)"))
        
     oo_ev = []
-    oo_score = onlyoffice_checks(content, oo_ev)
+    oo_score = onlyoffice_checks(content, oo_ev, doc_lower)
     if oo_score >= 2:
         scores["onlyoffice"] = min(10.0, scores["onlyoffice"] + oo_score)
         for e in oo_ev:
@@ -725,144 +892,329 @@ def check_speculative_lomarkeshare(xml_bundle):
 
 # --- Scoring engine ----------------------------------------------------------
 
+# Parts that are also walked as element trees; their bytes are kept for parsing.
+XML_PARTS = ("app", "styles")
+
+class LazyParts(dict):
+    """The ``parts`` mapping handed to the checks, filled in on first access.
+
+    Each key is produced by its entry in ``_READERS``, so members (and the
+    derived hit sets / trees) that no check asks for are never inflated.
+    """
+
+    __slots__ = ("zf", "mm", "names", "_raw")
+
+    def __init__(self, zf, mm=None):
+        super().__init__()
+        self.zf = zf
+        self.mm = mm
+        self.names = frozenset(zf.namelist())
+        self._raw = {}
+
+    def __missing__(self, key):
+        value = _READERS[key](self)
+        self[key] = value
+        return value
+
+    def raw(self, key):
+        """Bytes of the PART_NAMES member *key* (b"" when absent).
+
+        XML_PARTS are inflated once and handed to both their text and tree
+        readers; the second reader takes the buffer out so it isn't kept alive.
+        """
+        data = self._raw.pop(key, None)
+        if data is None:
+            name = PART_NAMES[key]
+            # Skip the lookup for members the central directory doesn't list;
+            # most non-Word writers omit several of PART_NAMES.
+            data = b""
+            if name in self.names:
+                data = read_mapped_member(self.mm, self.zf.getinfo(name)) if self.mm is not None else None
+                if data is None:
+                    data = read_bytes_from_zip(self.zf, name)
+            if key in XML_PARTS:
+                self._raw[key] = data
+        return data
+
+def _read_txt(key):
+    return lambda parts: parts.raw(key).decode("utf-8", "ignore")
+
+# Parts up to this size go through _scan_part's memo; document.xml never does.
+MEMO_MAX_CHARS = 1 << 16
+
+@functools.lru_cache(maxsize=256)
+def _scan_part(key, text):
+    # Template parts (theme, font table, styles, settings) repeat byte-for-byte
+    # across files from the same writer, so a batch mostly hits this memo.
+    return scan_needles(text, _NEEDLES[key])
+
+def _read_hits(key):
+    def reader(parts):
+        text = parts[f"{key}_txt"]
+        if len(text) <= MEMO_MAX_CHARS:
+            return _scan_part(key, text)
+        return scan_needles(text, _NEEDLES[key])
+    return reader
+
+def _read_xml(key):
+    return lambda parts: parse_xml(parts.raw(key))
+
+def _read_doc_scan(key):
+    def reader(parts):
+        parts.update(scan_document_xml(parts["doc_txt"]))
+        return parts[key]
+    return reader
+
+def _read_application_name(parts):
+    app_xml = parts["app_xml"]
+    if app_xml is None:
+        return ""
+    elem = app_xml.find("ep:Application", NAMESPACES)
+    if elem is None:
+        # Strict OOXML, namespace-less or otherwise prefixed writers: first
+        # element whose tag ends in "Application", as the checks always matched.
+        elem = next((e for e in app_xml.iter() if e.tag.endswith("Application")), None)
+    return (elem.text or "").lower() if elem is not None else ""
+
+_READERS = {f"{key}_txt": _read_txt(key) for key in PART_NAMES}
+_READERS.update({f"{key}_hits": _read_hits(key) for key in _NEEDLES if key != "doc"})
+_READERS.update({key: _read_doc_scan(key) for key in ("doc_hits", "n_wr", "n_wp")})
+_READERS["app_core_txt"] = lambda parts: parts["app_txt"] + parts["core_txt"]
+_READERS["app_core_lower"] = lambda parts: parts["app_core_txt"].lower()
+_READERS["doc_lower"] = lambda parts: parts["doc_txt"].lower()
+_READERS["app_xml"] = _read_xml("app")
+_READERS["styles_xml"] = _read_xml("styles")
+_READERS["ct_overrides"] = lambda parts: _RE_CT_OVERRIDE.findall(parts["content_types_txt"])
+_READERS["ct_parts"] = lambda parts: frozenset(parts["ct_overrides"])
+_READERS["application_name"] = _read_application_name
+
+# Origin checks that only look at the parts. word_checks is run after them
+# because it discounts against the LibreOffice / Google Docs / Pages scores.
+_SCORERS = {
+    "libreoffice": lo_checks,
+    "google_docs": gdocs_checks,
+    "apple_pages": pages_checks,
+    "pandoc": pandoc_checks,
+    "wordpad": wordpad_checks,
+    "textedit": textedit_checks,
+}
+
+# Report order of the per-origin scores and evidence (choose_verdict breaks
+# ties by this order).
+ORIGINS = ("word",) + tuple(_SCORERS)
+
+# Origins that count towards the "taint" figure.
+TAINT_ORIGINS = ("libreoffice", "google_docs", "apple_pages", "pandoc")
+
+# When one origin scores at least HIGH_CONFIDENCE and every other origin at most
+# HIGH_CONFIDENCE_REST, the other-engine scan (check_speculative_lomarkeshare)
+# is skipped and its block comes back empty. The Word Web / SharePoint check
+# always runs: a clean Word file is exactly where its evidence matters.
+HIGH_CONFIDENCE = 9.5
+HIGH_CONFIDENCE_REST = 3.0
+
 def score_docx(path):
-    with zipfile.ZipFile(path) as zf:
-        parts = {
-            "app_xml": read_xml_from_zip(zf, "docProps/app.xml"),
-            "font_xml": read_xml_from_zip(zf, "word/fontTable.xml"),
-            "doc_xml": read_xml_from_zip(zf, "word/document.xml"),
-            "styles_xml": read_xml_from_zip(zf, "word/styles.xml"),
-            "settings_xml": read_xml_from_zip(zf, "word/settings.xml"),
-            "theme_xml": read_xml_from_zip(zf, "word/theme/theme1.xml"),
-            "content_types_txt": read_text_from_zip(zf, "[Content_Types].xml"),
-            "custom_props_txt": read_text_from_zip(zf, "docProps/custom.xml"),
-            "core_txt": read_text_from_zip(zf, "docProps/core.xml"),
-            "app_txt": read_text_from_zip(zf, "docProps/app.xml"),
-            "font_txt": read_text_from_zip(zf, "word/fontTable.xml"),
-            "doc_txt": read_text_from_zip(zf, "word/document.xml"),
-            "styles_txt": read_text_from_zip(zf, "word/styles.xml"),
-            "settings_txt": read_text_from_zip(zf, "word/settings.xml"),
-            "theme_txt": read_text_from_zip(zf, "word/theme/theme1.xml"),
-        }
-        lo_score, lo_ev = lo_checks(zf, parts)
-        gd_score, gd_ev = gdocs_checks(zf, parts)
-        pg_score, pg_ev = pages_checks(zf, parts)
-        pd_score, pd_ev = pandoc_checks(zf, parts)
-        wd_score, wd_ev = word_checks(zf, parts, lo_score, gd_score, pg_score)
-        word_variant_scores, word_variant_ev = word_variants_checks(zf, parts)
-        wp_score, wp_ev = wordpad_checks(zf, parts)
-        te_score, te_ev = textedit_checks(zf, parts)
-
-        scores = {
-            "word": wd_score,
-            "libreoffice": lo_score,
-            "google_docs": gd_score,
-            "apple_pages": pg_score,
-            "pandoc": pd_score,
-            "wordpad": wp_score,
-            "textedit": te_score,
-            
-        }
-
-        verdict = choose_verdict(scores)
-        evidence = {
-            "word": wd_ev,
-            "libreoffice": lo_ev,
-            "google_docs": gd_ev,
-            "apple_pages": pg_ev,
-            "pandoc": pd_ev,
-            "wordpad": wp_ev,
-            "textedit": te_ev,
-        }
-
-        taint_like = max(lo_score, gd_score, pg_score, pd_score)
-        
-        # Speculative checks (Word Web / SharePoint & other engines)
-        wordweb_score, wordweb_ev = check_speculative_wordaspect(zf)
-
-        lo_extras, lo_extra_ev = check_speculative_lomarkeshare({
-            "app": parts["app_txt"],
-            "core": parts["core_txt"],
-            "font": parts["font_txt"],
-            "styles": parts["styles_txt"],
-            "theme": parts["theme_txt"],
-            "content": parts["doc_txt"],
-        })
-
-
-        return {
-            "scores": scores,
-            "verdict": verdict,
-            "taint": taint_like,
-            "evidence": evidence,
-            "word_variants": {
-                "scores": word_variant_scores,
-                "evidence": word_variant_ev,
+    if hasattr(path, "read") and hasattr(path, "seek"):
+        # An already open file object (e.g. BytesIO): plain zipfile reads.
+        with zipfile.ZipFile(path) as zf:
+            return score_parts(zf, LazyParts(zf, None))
+    with open(path, "rb") as f:
+        mm = map_file(f)
+        try:
+            with zipfile.ZipFile(f) as zf:
+                return score_parts(zf, LazyParts(zf, mm))
+        finally:
+            if mm is not None:
+                mm.close()
+
+def score_parts(zf, parts):
+    """Score an already opened archive; *parts* is its LazyParts view."""
+    results = {origin: check(zf, parts) for origin, check in _SCORERS.items()}
+    results["word"] = word_checks(
+        zf, parts,
+        results["libreoffice"][0], results["google_docs"][0], results["apple_pages"][0],
+    )
+    word_variant_scores, word_variant_ev = word_variants_checks(zf, parts)
+
+    scores = {origin: results[origin][0] for origin in ORIGINS}
+    verdict = choose_verdict(scores)
+    evidence = {origin: results[origin][1] for origin in ORIGINS}
+
+    taint_like = max(scores[origin] for origin in TAINT_ORIGINS)
+    
+    # Speculative checks (Word Web / SharePoint & other engines)
+    wordweb_score, wordweb_ev = check_speculative_wordaspect(zf, parts)
+
+    ranked = sorted(scores.values())
+    if ranked[-1] >= HIGH_CONFIDENCE and ranked[-2] <= HIGH_CONFIDENCE_REST:
+        lo_extras, lo_extra_ev = {}, []
+    else:
+        lo_extras, lo_extra_ev = check_speculative_lomarkeshare(zf, parts)
+
+
+    return {
+        "scores": scores,
+        "verdict": verdict,
+        "taint": taint_like,
+        "evidence": evidence,
+        "word_variants": {
+            "scores": word_variant_scores,
+            "evidence": word_variant_ev,
+        },
+        "speculative": {
+            "word_web": {
+                "score": wordweb_score,
+                "evidence": wordweb_ev,
             },
-            "speculative": {
-                "word_web": {
-                    "score": wordweb_score,
-                    "evidence": wordweb_ev,
-                },
-                "other_engines": {
-                    "scores": lo_extras,
-                    "evidence": lo_extra_ev,
-                },
+            "other_engines": {
+                "scores": lo_extras,
+                "evidence": lo_extra_ev,
             },
-        }
+        },
+    }
+
+
+def score_many(paths, workers=None, return_exceptions=False, cache=None):
+    """Score several DOCX files concurrently; results are returned in input order.
+
+    Threads rather than processes: inflating members (zlib) releases the GIL and
+    results need no pickling. With ``return_exceptions=True`` a file that fails
+    yields its exception in place of a result instead of aborting the batch.
+    Pass a ``ResultCache`` as *cache* to reuse results of unchanged files.
+    """
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise ValueError(f"workers must be a positive integer or None, got {workers!r}")
+    paths = list(paths)
+    score = cache.score if cache is not None else score_docx
+
+    def run(path):
+        try:
+            return score(path)
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            return exc
+
+    if len(paths) <= 1 or workers == 1:
+        return [run(path) for path in paths]
+    # Imported here: concurrent.futures pulls in logging, which single-file CLI
+    # runs would otherwise pay for at start-up.
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return list(pool.map(run, paths))
+
+
+# --- Result cache ------------------------------------------------------------
+
+# Bump whenever a check, needle or weight changes; older cached results are then
+# ignored rather than served.
+HEURISTICS_VERSION = "2026-10-f"
+
+CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "taintedword", "results.sqlite",
+)
+
+def file_digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class ResultCache:
+    """score_docx results stored in sqlite, keyed by file content.
+
+    The key is the BLAKE2b digest of the file plus HEURISTICS_VERSION, so a
+    modified file or a heuristics change is simply a miss. Results are returned
+    as stored, i.e. after a JSON round trip (tuples become lists), on a miss as
+    well as on a hit. One connection is shared behind a lock, which makes an
+    instance safe to hand to score_many.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        import sqlite3  # only runs that use the cache pay for the import
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Short busy timeout: another process holding the cache should cost a
+        # cache miss, not seconds per file.
+        self._db = sqlite3.connect(path, timeout=0.1, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (digest TEXT, version TEXT, result TEXT,"
+                " PRIMARY KEY (digest, version))"
+            )
+
+    def score(self, path):
+        import sqlite3
+        digest = file_digest(path)
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT result FROM results WHERE digest = ? AND version = ?",
+                    (digest, HEURISTICS_VERSION),
+                ).fetchone()
+        except sqlite3.Error:
+            row = None  # unreadable or locked cache: score as on a miss
+        if row is not None:
+            return json.loads(row[0])
+        payload = json.dumps(score_docx(path))
+        try:
+            with self._lock, self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                    (digest, HEURISTICS_VERSION, payload),
+                )
+        except sqlite3.Error:
+            pass  # a read-only or locked cache only costs us the speedup
+        return json.loads(payload)
+
+    def close(self):
+        self._db.close()
 
 
 # --- CLI ---------------------------------------------------------------------
 
-def main():
-    p = argparse.ArgumentParser(description="Score DOCX provenance (Word, LibreOffice, Google Docs, Apple Pages, Pandoc)")
-    p.add_argument("file", help="Path to .docx file")
-    p.add_argument("--json", action="store_true", help="Output JSON report")
-    p.add_argument("--concise", action="store_true", help="Say little.")
-    args = p.parse_args()
-    try:
-        result = score_docx(args.file)
-    except FileNotFoundError:
-        print(f"Error: file not found: {args.file}", file=sys.stderr)
-        sys.exit(1)
-    except zipfile.BadZipFile:
-        print(f"Error: not a valid DOCX file: {args.file}", file=sys.stderr)
-        sys.exit(1)
+def expand_paths(args):
+    """Expand glob patterns ourselves (not every shell does); keep literal paths as given."""
+    paths = []
+    for arg in args:
+        matches = sorted(glob.glob(arg)) if any(c in arg for c in "*?[") and not os.path.exists(arg) else []
+        paths.extend(matches or [arg])
+    return paths
+
+def concise_verdict(verdict):
+    words = verdict.split()
+    return words[0] if len(words) < 2 else words[1]
+
+def json_report(path, result, concise=False):
+    if concise:
+        return {"verdict": concise_verdict(result["verdict"])}
+    return {
+        "file": path,
+        "scores": result["scores"],
+        "verdict": result["verdict"],
+        "taint": result["taint"],
+        "evidence": result["evidence"],
+        "speculative": result.get("speculative", {})
+    }
+
+def print_report(path, result, concise=False, batch=False):
     scores = result["scores"]
     verdict = result["verdict"]
     taint = result["taint"]
     evidence = result["evidence"]
-    
-    if args.concise:
-        verdict2 = verdict.split()
-        verdict = verdict2[0] if len(verdict2) < 2 else verdict2[1]
-    
-    if args.json:
-        if args.concise:
-            print(json.dumps({
-                "verdict": verdict,
-            }, indent=2))
-        else:
-            print(json.dumps({
-                "file": args.file,
-                "scores": scores,
-                "verdict": verdict,
-                "taint": taint,
-                "evidence": evidence,
-                "speculative": result.get("speculative", {})
-            }, indent=2))
-        return
-        
-    if args.concise:
-        print(f"File: {verdict}")
-        return
 
+    if concise:
+        verdict = concise_verdict(verdict)
+        print(f"{path}: {verdict}" if batch else f"File: {verdict}")
+        return
 
     print("Word Variant Summary:")
     print(summarize_provenance(result))
     print()
 
-    print(f"{args.file}")
+    print(f"{path}")
     print(f"Verdict: {verdict}")
     print("Scores (0–10):")
     print(f"  - Microsoft Word : {scores['word']:.1f}")
@@ -918,6 +1270,120 @@ def main():
         print()
 
 
+def write_json(obj):
+    """Print *obj* as indented JSON. With orjson the text is the same except that
+    non-ASCII characters are written as UTF-8 instead of \\u escapes."""
+    out = getattr(sys.stdout, "buffer", None)
+    try:
+        import orjson  # imported here so runs without --json don't load it
+    except ImportError:
+        orjson = None
+    if orjson is not None and out is not None:
+        sys.stdout.flush()
+        out.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2) + b"\n")
+        out.flush()
+    else:
+        print(json.dumps(obj, indent=2))
+
+USAGE = "usage: {prog} [-h] [--json] [--concise] [--workers WORKERS] [--no-cache] file [file ...]"
+
+HELP = """{usage}
+
+Score DOCX provenance (Word, LibreOffice, Google Docs, Apple Pages, Pandoc)
+
+positional arguments:
+  file               Path(s) to .docx file(s); glob patterns are expanded
+
+options:
+  -h, --help         show this help message and exit
+  --json             Output JSON report
+  --concise          Say little.
+  --workers WORKERS  Threads used when scoring several files (default: CPU count)
+  --no-cache         Always rescore; don't read or write the result cache
+                     ({cache_path})"""
+
+def parse_args(argv):
+    """Parse the command line by hand; importing argparse alone costs more
+    start-up time than scoring a typical file. Errors mimic argparse (exit 2)."""
+    prog = os.path.basename(sys.argv[0])
+
+    def fail(msg):
+        print(USAGE.format(prog=prog), file=sys.stderr)
+        print(f"{prog}: error: {msg}", file=sys.stderr)
+        sys.exit(2)
+
+    args = types.SimpleNamespace(file=[], json=False, concise=False, workers=None, no_cache=False)
+    argv = iter(argv)
+    for arg in argv:
+        if arg in ("-h", "--help"):
+            print(HELP.format(usage=USAGE.format(prog=prog), cache_path=CACHE_PATH))
+            sys.exit(0)
+        elif arg == "--json":
+            args.json = True
+        elif arg == "--concise":
+            args.concise = True
+        elif arg == "--no-cache":
+            args.no_cache = True
+        elif arg == "--workers" or arg.startswith("--workers="):
+            value = arg.partition("=")[2] if "=" in arg else next(argv, None)
+            if value is None:
+                fail("argument --workers: expected one argument")
+            try:
+                args.workers = int(value)
+            except ValueError:
+                fail(f"argument --workers: invalid int value: '{value}'")
+            if args.workers < 1:
+                fail(f"argument --workers: must be at least 1, got {args.workers}")
+        elif arg == "--":
+            args.file.extend(argv)
+        elif arg.startswith("-") and arg != "-":
+            fail(f"unrecognized arguments: {arg}")
+        else:
+            args.file.append(arg)
+    if not args.file:
+        fail("the following arguments are required: file")
+    return args
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    paths = expand_paths(args.file)
+    batch = len(paths) > 1
+    cache = None
+    if not args.no_cache:
+        import sqlite3
+        try:
+            cache = ResultCache()
+        except (OSError, sqlite3.Error):
+            pass
+    failed = False
+    reports = []
+    results = score_many(paths, args.workers, return_exceptions=True, cache=cache)
+    if cache is not None:
+        cache.close()
+    for path, result in zip(paths, results):
+        if isinstance(result, Exception):
+            failed = True
+            if isinstance(result, FileNotFoundError):
+                print(f"Error: file not found: {path}", file=sys.stderr)
+            elif isinstance(result, zipfile.BadZipFile):
+                print(f"Error: not a valid DOCX file: {path}", file=sys.stderr)
+            elif batch:
+                print(f"Error: could not score {path}: {result}", file=sys.stderr)
+            else:
+                raise result
+        elif args.json:
+            report = json_report(path, result, args.concise)
+            reports.append({"file": path, **report} if batch and args.concise else report)
+        else:
+            print_report(path, result, args.concise, batch)
+    if batch and args.json:
+        write_json(reports)  # "[]" when every file failed, never empty output
+    elif reports:
+        write_json(reports[0])
+    if failed:
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
 